@@ -0,0 +1,72 @@
+"""
+Maintain the monthly documents partitions.
+
+Creates upcoming partitions, moves rows that fell into documents_default
+into their monthly partitions, then exports every partition older than the
+retention window to a gzipped CSV and drops it.
+
+The app only creates partitions at startup, so run this on a schedule
+(e.g. daily from cron) to keep partitions ahead of the calendar:
+    0 3 * * * cd /path/to/backend && python -m app.cli.archive_documents
+
+Usage (from the backend directory):
+    python -m app.cli.archive_documents [--dry-run] [--older-than-months N] [--output-dir DIR]
+"""
+import argparse
+from datetime import date, datetime, timezone
+
+from app.core.config import settings
+from app.db.partitions import (
+    archive_partition, create_partition, default_partition_months, ensure_partitions,
+    list_partitions, partition_name
+)
+from app.db.session import SessionLocal
+
+
+def months_before(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old documents partitions")
+    parser.add_argument("--dry-run", action="store_true", help="Only list partitions that would be archived")
+    parser.add_argument("--older-than-months", type=int, default=settings.DOCUMENT_ARCHIVE_AFTER_MONTHS)
+    parser.add_argument("--output-dir", default=settings.DOCUMENT_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+    cutoff = months_before(current_month, args.older_than_months)
+
+    db = SessionLocal()
+    try:
+        # Rows land in documents_default when the app ran past its
+        # pre-created partitions; give each such month its own partition
+        # so it can be archived like the others.
+        stray_months = default_partition_months(db)
+        if args.dry_run:
+            for month in stray_months:
+                print(f"Would move rows from documents_default into {partition_name(month)}")
+            months = sorted(set(list_partitions(db)) | set(stray_months))
+        else:
+            for month in stray_months:
+                create_partition(db, month)
+            ensure_partitions(db, settings.DOCUMENT_PARTITIONS_AHEAD)
+            months = list_partitions(db)
+        expired = [month for month in months if month < cutoff]
+    finally:
+        db.close()
+
+    for month in expired:
+        if args.dry_run:
+            print(f"Would archive {partition_name(month)}")
+            continue
+        archive_path = archive_partition(month, args.output_dir)
+        print(f"Archived {partition_name(month)} to {archive_path}")
+
+    if not expired:
+        print(f"No partitions older than {cutoff:%Y-%m}")
+
+
+if __name__ == "__main__":
+    main()
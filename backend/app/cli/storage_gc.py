@@ -0,0 +1,46 @@
+"""
+Reclaim upload storage.
+
+Releases the stored uploads of documents older than UPLOAD_RETENTION_DAYS
+(if set), moves the remaining flat uploads/{uuid}{ext} files from before
+the blob store into it, and deletes blobs that no document references
+anymore.
+
+Usage (from the backend directory):
+    python -m app.cli.storage_gc [--dry-run] [--retention-days N] [--grace-hours N]
+"""
+import argparse
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.storage import get_blob_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Garbage collect unreferenced upload blobs")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted")
+    parser.add_argument("--retention-days", type=int, default=settings.UPLOAD_RETENTION_DAYS)
+    parser.add_argument("--grace-hours", type=int, default=settings.STORAGE_GC_GRACE_HOURS)
+    args = parser.parse_args()
+
+    blob_store = get_blob_store()
+    db = SessionLocal()
+    try:
+        if args.retention_days is not None:
+            expired = blob_store.expire_documents(db, args.retention_days, dry_run=args.dry_run)
+            print(f"Documents past retention: {expired}")
+
+        # Runs after retention so expired legacy files are not hashed first
+        moved = blob_store.backfill_legacy(db, dry_run=args.dry_run)
+        print(f"{'Would move' if args.dry_run else 'Moved'} {moved} legacy uploads into the blob store")
+
+        stats = blob_store.gc(db, args.grace_hours, dry_run=args.dry_run)
+        prefix = "Would delete" if args.dry_run else "Deleted"
+        print(f"{prefix} {stats['blobs_deleted']} blobs ({stats['bytes_reclaimed']} bytes) "
+              f"and {stats['orphans_deleted']} orphaned objects")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
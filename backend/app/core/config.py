@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -13,12 +13,31 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "doc_classifier")
     SQLALCHEMY_DATABASE_URI: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+    # documents is partitioned by month on created_at
+    DOCUMENT_PARTITIONS_AHEAD: int = 3  # months of partitions created in advance
+    DOCUMENT_ARCHIVE_AFTER_MONTHS: int = 12
+    DOCUMENT_ARCHIVE_DIR: str = os.getenv("DOCUMENT_ARCHIVE_DIR", "archives")
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = [".txt", ".pdf", ".docx"]
-    
+
+    # Blob Storage
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")  # "local" or "s3"
+    STORAGE_ROOT: str = os.getenv("STORAGE_ROOT", "uploads/blobs")
+    STORAGE_SHARD_DEPTH: int = 2  # two levels of 2-hex-char directories
+    STORAGE_COMPRESSION: str = os.getenv("STORAGE_COMPRESSION", "zstd")  # "zstd" or "none"
+    STORAGE_COMPRESSION_LEVEL: int = 3
+    STORAGE_S3_ENDPOINT: str = os.getenv("STORAGE_S3_ENDPOINT", "http://localhost:9000")
+    STORAGE_S3_BUCKET: str = os.getenv("STORAGE_S3_BUCKET", "doc-classifier")
+    STORAGE_S3_ACCESS_KEY: str = os.getenv("STORAGE_S3_ACCESS_KEY", "minioadmin")
+    STORAGE_S3_SECRET_KEY: str = os.getenv("STORAGE_S3_SECRET_KEY", "minioadmin")
+    # Unreferenced blobs younger than this are kept so in-flight uploads are safe
+    STORAGE_GC_GRACE_HOURS: int = 24
+    # Drop stored uploads of documents older than this (None keeps them forever)
+    UPLOAD_RETENTION_DAYS: Optional[int] = None
+
     # ML Model
     MODEL_NAME: str = "facebook/bart-large-mnli"
     CLASSIFICATION_CATEGORIES: List[str] = [
@@ -36,6 +55,16 @@ class Settings(BaseSettings):
         "low": 0.20      # Red: Below 35%
     }
     
+    # Profiling (disabled unless an admin token or a sample rate is set)
+    PROFILING_ADMIN_TOKEN: str = os.getenv("PROFILING_ADMIN_TOKEN", "")
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_HEADER: str = "X-Profile"  # opt-in header, needs X-Admin-Token
+    PROFILING_PATHS: List[str] = ["/api/classify", "/api/classify-batch"]
+    PROFILING_INTERVAL: float = 0.001  # sampling interval in seconds
+    PROFILING_TORCH: bool = False  # also record a torch.profiler trace
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_KEEP: int = 50
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
@@ -0,0 +1,125 @@
+import gzip
+import os
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+
+PARTITION_NAME = re.compile(r"^documents_(\d{4})_(\d{2})$")
+
+# gzip level 9 is several times slower for a few percent smaller files
+ARCHIVE_COMPRESSLEVEL = 6
+ARCHIVE_LOCK_TIMEOUT = "5s"
+
+
+def ensure_partitions(db: Session, months_ahead: int) -> List[str]:
+    """Create any missing monthly partitions from now up to months_ahead."""
+    names = [row[0] for row in db.execute(
+        text("SELECT ensure_documents_partitions(:months_ahead)"),
+        {"months_ahead": months_ahead}
+    )]
+    db.commit()
+    return names
+
+
+def create_partition(db: Session, month: date) -> str:
+    """Create the partition for month, moving its rows out of documents_default."""
+    name = db.execute(
+        text("SELECT create_documents_partition(:month_start)"),
+        {"month_start": month}
+    ).scalar()
+    db.commit()
+    return name
+
+
+def default_partition_months(db: Session) -> List[date]:
+    """Months that have rows sitting in documents_default."""
+    rows = db.execute(text(
+        "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date "
+        "FROM documents_default ORDER BY 1"
+    ))
+    return [month for (month,) in rows]
+
+
+def list_partitions(db: Session) -> List[date]:
+    """Return the first day of the month of every attached monthly partition."""
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'documents'::regclass"
+    ))
+    months = []
+    for (name,) in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def partition_name(month: date) -> str:
+    return f"documents_{month:%Y_%m}"
+
+
+def archive_partition(month: date, output_dir: str) -> Optional[str]:
+    """
+    Export a monthly partition to a gzipped CSV, then detach and drop it.
+
+    The export runs against the still-attached partition, which only needs
+    a share lock on that partition, so the app keeps reading and writing
+    documents meanwhile. The parent table is locked only for the short
+    detach/drop transaction at the end. The stored uploads of archived
+    documents are released, so the blob garbage collector can reclaim them.
+    Returns the archive path, or None if the partition does not exist.
+    """
+    name = partition_name(month)
+    os.makedirs(output_dir, exist_ok=True)
+    archive_path = os.path.join(output_dir, f"{name}.csv.gz")
+
+    # copy_expert needs the raw psycopg2 connection
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT to_regclass(%s)", (name,))
+        exists = cursor.fetchone()[0] is not None
+        # End this transaction so the export below can pick its isolation level
+        connection.rollback()
+        if not exists:
+            return None
+
+        # Count and export from the same snapshot. Write to a temp file first
+        # so a failed export never looks complete.
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute(f'SELECT count(*) FROM "{name}"')
+        exported = cursor.fetchone()[0]
+        tmp_path = archive_path + ".tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=ARCHIVE_COMPRESSLEVEL) as archive:
+            cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+        connection.commit()
+        os.replace(tmp_path, archive_path)
+
+        # Short transaction holding the lock on documents. Give up instead of
+        # queueing behind long queries, since queued requests would wait too.
+        cursor.execute(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'")
+        cursor.execute(f'ALTER TABLE documents DETACH PARTITION "{name}"')
+        cursor.execute(f'SELECT count(*) FROM "{name}"')
+        if cursor.fetchone()[0] != exported:
+            raise RuntimeError(f"{name} changed during export; archive it again")
+        cursor.execute(
+            "UPDATE blobs SET ref_count = blobs.ref_count - released.count "
+            f'FROM (SELECT blob_hash, count(*) AS count FROM "{name}" '
+            "WHERE blob_hash IS NOT NULL GROUP BY blob_hash) AS released "
+            "WHERE blobs.hash = released.blob_hash"
+        )
+        cursor.execute(f'DROP TABLE "{name}"')
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return archive_path
@@ -1,17 +1,23 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import os
-import uuid
 from datetime import datetime, timezone
 from sqlalchemy import func
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.partitions import ensure_partitions
+from app.db.session import SessionLocal, get_db
 from app.models.document import Document
 from app.services.classifier import DocumentClassifier
 from app.services.document_processor import DocumentProcessor
+from app.services.profiler import (
+    artifact_path, is_admin, list_profiles, profile_request, profiling_enabled,
+    request_id_from, should_profile
+)
+from app.services.storage import get_blob_store
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -28,8 +34,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize classifier
+async def profile_classify_requests(request: Request, call_next):
+    """Profile classify requests opted in via the admin header or sampling."""
+    if request.url.path not in settings.PROFILING_PATHS or not should_profile(request.headers):
+        return await call_next(request)
+
+    request_id = request_id_from(request.headers)
+    with profile_request(request_id, request.method, request.url.path) as meta:
+        response = await call_next(request)
+        meta["status_code"] = response.status_code
+    response.headers["X-Profile-ID"] = request_id
+    return response
+
+# Only install the profiling middleware when it can be triggered, so
+# requests pay nothing for it otherwise
+if profiling_enabled():
+    app.middleware("http")(profile_classify_requests)
+
+# Initialize classifier and upload storage
 classifier = DocumentClassifier()
+blob_store = get_blob_store()
+
+@app.on_event("startup")
+def create_upcoming_partitions():
+    """Make sure documents has partitions for the coming months."""
+    db = SessionLocal()
+    try:
+        ensure_partitions(db, settings.DOCUMENT_PARTITIONS_AHEAD)
+    except Exception as e:
+        print(f"Error creating document partitions: {str(e)}")
+    finally:
+        db.close()
+
+def filter_created_between(query, since: Optional[datetime], until: Optional[datetime]):
+    """Restrict a Document query to a created_at window so Postgres can prune partitions."""
+    if since:
+        query = query.filter(Document.created_at >= since)
+    if until:
+        query = query.filter(Document.created_at < until)
+    return query
 
 @app.post("/api/classify")
 async def classify_document(
@@ -63,7 +106,7 @@ async def classify_document(
             
         # Process document with enhanced error handling
         try:
-            text_content = DocumentProcessor.process_document(file_path)
+            text_content = DocumentProcessor.process_content(content, file_extension)
         except UnicodeDecodeError:
             raise HTTPException(
                 status_code=422,
@@ -85,17 +128,16 @@ async def classify_document(
                 }
             )
 
-        # Extract text from the document
-        text = await process_document_content(content, file.filename)
-        
         # Get classification results
-        result = classifier.classify_document(text, file.filename)
+        result = classifier.classify_document(text_content, file.filename)
 
-        # Save to database
+        # Store the upload (deduplicated by content) and save to database
+        blob = blob_store.put(db, content)
         document = Document(
-            filename=os.path.basename(file_path),
+            filename=os.path.basename(blob.storage_key),
             original_filename=file.filename,
-            file_path=file_path,
+            file_path=blob.storage_key,
+            blob_hash=blob.hash,
             file_type=file_extension,
             file_size=len(content),
             predicted_category=result["predicted_category"],
@@ -122,9 +164,6 @@ async def classify_documents(
     results = []
     for file in files:
         try:
-            # Create uploads directory if it doesn't exist
-            os.makedirs("uploads", exist_ok=True)
-            
             # Validate file extension
             file_extension = os.path.splitext(file.filename)[1].lower()
             if file_extension not in settings.ALLOWED_EXTENSIONS:
@@ -135,12 +174,8 @@ async def classify_documents(
                 continue
             
             # Process file and get classification
-            file_path = f"uploads/{uuid.uuid4()}{file_extension}"
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-
-            text_content = DocumentProcessor.process_document(file_path)
+            content = await file.read()
+            text_content = DocumentProcessor.process_content(content, file_extension)
             if not text_content:
                 results.append({
                     "filename": file.filename,
@@ -150,11 +185,13 @@ async def classify_documents(
 
             result = classifier.classify_document(text_content, file.filename)
             
-            # Save to database
+            # Store the upload (deduplicated by content) and save to database
+            blob = blob_store.put(db, content)
             document = Document(
-                filename=os.path.basename(file_path),
+                filename=os.path.basename(blob.storage_key),
                 original_filename=file.filename,
-                file_path=file_path,
+                file_path=blob.storage_key,
+                blob_hash=blob.hash,
                 file_type=file_extension,
                 file_size=len(content),
                 predicted_category=result["predicted_category"],
@@ -173,6 +210,7 @@ async def classify_documents(
             })
 
         except Exception as e:
+            db.rollback()
             results.append({
                 "filename": file.filename,
                 "error": str(e)
@@ -181,21 +219,30 @@ async def classify_documents(
     return results
 
 @app.get("/api/documents")
-def get_documents(db: Session = Depends(get_db)):
-    """Get all classified documents"""
-    documents = db.query(Document).order_by(Document.created_at.desc()).all()
+def get_documents(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Get all classified documents, optionally within a created_at window"""
+    query = filter_created_between(db.query(Document), since, until)
+    documents = query.order_by(Document.created_at.desc()).all()
     return documents
 
 @app.get(f"{settings.API_V1_STR}/documents")
 def list_documents(
     skip: int = 0,
     limit: int = 10,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
     """
-    List all classified documents with pagination.
+    List all classified documents with pagination, optionally within a
+    created_at window.
     """
-    documents = db.query(Document).offset(skip).limit(limit).all()
+    query = filter_created_between(db.query(Document), since, until)
+    documents = query.offset(skip).limit(limit).all()
     return documents
 
 @app.get(f"{settings.API_V1_STR}/documents/{{document_id}}")
@@ -215,13 +262,19 @@ def get_document(
     return document
 
 @app.get("/api/stats")
-async def get_document_stats(db: Session = Depends(get_db)):
+async def get_document_stats(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
     try:
+        query = filter_created_between(db.query(Document), since, until)
+
         # Get total documents
-        total_documents = db.query(Document).count()
+        total_documents = query.count()
         
         # Get category distribution and additional stats
-        documents = db.query(Document).all()
+        documents = query.all()
         
         # Calculate category distribution
         category_distribution = {}
@@ -243,4 +296,27 @@ async def get_document_stats(db: Session = Depends(get_db)):
         
     except Exception as e:
         print(f"Error fetching stats: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to fetch document statistics") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to fetch document statistics")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+def get_profiles():
+    """List recent request profiles, newest first"""
+    return list_profiles()
+
+@app.get("/api/admin/profiles/{request_id}/{artifact}", dependencies=[Depends(require_admin)])
+def download_profile(request_id: str, artifact: str):
+    """
+    Download a profile artifact: "flamegraph" (HTML), "speedscope" (JSON)
+    or "torch" (Chrome trace, when PROFILING_TORCH is enabled).
+    """
+    path = artifact_path(request_id, artifact)
+    if not path:
+        raise HTTPException(
+            status_code=404,
+            detail="Profile not found"
+        )
+    return FileResponse(path, filename=os.path.basename(path))
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # SHA-256 of the original (uncompressed) upload
+    hash = Column(String(64), primary_key=True)
+    storage_key = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)  # original size in bytes
+    stored_size = Column(Integer, nullable=False)  # size on the backend in bytes
+    compression = Column(String(16), nullable=False, default="none")
+
+    # Number of documents pointing at this blob
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_referenced_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
@@ -9,6 +9,7 @@ class Document(Base):
     filename = Column(String, nullable=False)
     original_filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
+    blob_hash = Column(String(64), ForeignKey("blobs.hash"), nullable=True, index=True)
     file_type = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
     
@@ -18,7 +19,7 @@ class Document(Base):
     category_scores = Column(JSON, nullable=False)  # Store scores for all categories
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # partition key
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Optional fields
@@ -1,3 +1,4 @@
+import io
 import os
 from typing import Optional
 from PyPDF2 import PdfReader
@@ -56,6 +57,32 @@ class DocumentProcessor:
             print(f"Error processing document {file_path}: {str(e)}")
             return None
 
+    @classmethod
+    def process_content(cls, content: bytes, file_extension: str) -> Optional[str]:
+        """
+        Extract text from an in-memory upload without writing it to disk.
+        
+        Args:
+            content: Raw bytes of the uploaded file
+            file_extension: Lowercase extension including the dot, e.g. ".pdf"
+            
+        Returns:
+            Extracted text content or None if processing fails
+        """
+        try:
+            if file_extension == '.pdf':
+                return cls.extract_text_from_pdf(io.BytesIO(content))
+            elif file_extension == '.docx':
+                return cls.extract_text_from_docx(io.BytesIO(content))
+            elif file_extension == '.txt':
+                return content.decode('utf-8').strip()
+            else:
+                raise ValueError(f"Unsupported file type: {file_extension}")
+                
+        except Exception as e:
+            print(f"Error processing {file_extension} content: {str(e)}")
+            return None
+
     @staticmethod
     def validate_file(file_path: str) -> bool:
         """
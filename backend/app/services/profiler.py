@@ -0,0 +1,184 @@
+import hmac
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+REQUEST_ID = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+# Artifact name -> file suffix inside PROFILE_DIR
+ARTIFACTS = {
+    "flamegraph": ".html",
+    "speedscope": ".speedscope.json",
+    "torch": ".torch.json",
+}
+
+# Only one request is profiled at a time; the sampler covers the whole
+# event loop thread, so overlapping profiles would mix their samples.
+_active = False
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.PROFILING_ADMIN_TOKEN) or settings.PROFILING_SAMPLE_RATE > 0
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(settings.PROFILING_ADMIN_TOKEN) and token is not None and hmac.compare_digest(
+        token, settings.PROFILING_ADMIN_TOKEN
+    )
+
+
+def should_profile(headers) -> bool:
+    """Decide whether to profile a request: admin opt-in header or random sampling."""
+    if _active:
+        return False
+    if headers.get(settings.PROFILING_HEADER) and is_admin(headers.get("X-Admin-Token")):
+        return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def request_id_from(headers) -> str:
+    """
+    Pick the profile key. Only admins may choose it via X-Request-ID, and
+    an ID that already has a profile gets a random suffix instead of
+    replacing it.
+    """
+    request_id = headers.get("X-Request-ID")
+    if not (request_id and REQUEST_ID.match(request_id) and is_admin(headers.get("X-Admin-Token"))):
+        return uuid.uuid4().hex
+    if os.path.exists(_meta_path(request_id)):
+        return f"{request_id[:55]}-{uuid.uuid4().hex[:8]}"
+    return request_id
+
+
+def _meta_path(request_id: str) -> str:
+    return os.path.join(settings.PROFILE_DIR, request_id + ".meta.json")
+
+
+def _torch_profiler():
+    if not settings.PROFILING_TORCH:
+        return None
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError:
+        return None
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    return profile(activities=activities, record_shapes=True)
+
+
+@contextmanager
+def profile_request(request_id: str, method: str, path: str) -> Iterator[Dict]:
+    """
+    Run the enclosed block under the sampling profiler (and torch.profiler
+    when PROFILING_TORCH is set) and store the artifacts under request_id.
+
+    Yields a dict the caller can add metadata to, e.g. the status code.
+    """
+    global _active
+    from pyinstrument import Profiler
+
+    _active = True
+    meta = {
+        "request_id": request_id,
+        "method": method,
+        "path": path,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    sampler = Profiler(interval=settings.PROFILING_INTERVAL, async_mode="disabled")
+    torch_profiler = _torch_profiler()
+    started = time.perf_counter()
+    try:
+        with torch_profiler if torch_profiler is not None else nullcontext():
+            sampler.start()
+            try:
+                yield meta
+            finally:
+                sampler.stop()
+    finally:
+        _active = False
+        meta["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        try:
+            _save(request_id, meta, sampler, torch_profiler)
+        except Exception as e:
+            print(f"Error saving profile {request_id}: {str(e)}")
+
+
+def _save(request_id: str, meta: Dict, sampler, torch_profiler) -> None:
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    if os.path.exists(_meta_path(request_id)):
+        raise FileExistsError(f"Profile {request_id} already exists")
+
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILE_DIR, request_id)
+
+    with open(base + ARTIFACTS["flamegraph"], "w", encoding="utf-8") as file:
+        file.write(sampler.output_html())
+    with open(base + ARTIFACTS["speedscope"], "w", encoding="utf-8") as file:
+        file.write(sampler.output(renderer=SpeedscopeRenderer()))
+    artifacts = ["flamegraph", "speedscope"]
+
+    if torch_profiler is not None:
+        torch_profiler.export_chrome_trace(base + ARTIFACTS["torch"])
+        artifacts.append("torch")
+
+    meta["artifacts"] = artifacts
+    # Write to a temp file first so list_profiles never sees a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=settings.PROFILE_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, _meta_path(request_id))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _prune()
+
+
+def _prune() -> None:
+    """Keep only the PROFILE_KEEP most recent profiles."""
+    for meta in list_profiles()[settings.PROFILE_KEEP:]:
+        base = os.path.join(settings.PROFILE_DIR, meta["request_id"])
+        for suffix in list(ARTIFACTS.values()) + [".meta.json"]:
+            if os.path.exists(base + suffix):
+                os.remove(base + suffix)
+
+
+def list_profiles() -> List[Dict]:
+    """Return metadata of stored profiles, newest first. Unreadable files are skipped."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in os.listdir(settings.PROFILE_DIR):
+        if not filename.endswith(".meta.json"):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, filename), encoding="utf-8") as file:
+                meta = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Skipping profile metadata {filename}: {str(e)}")
+            continue
+        if isinstance(meta, dict) and "request_id" in meta and "created_at" in meta:
+            profiles.append(meta)
+    return sorted(profiles, key=lambda meta: meta["created_at"], reverse=True)
+
+
+def artifact_path(request_id: str, artifact: str) -> Optional[str]:
+    """Path of a stored artifact, or None if it does not exist."""
+    if not REQUEST_ID.match(request_id) or artifact not in ARTIFACTS:
+        return None
+    path = os.path.join(settings.PROFILE_DIR, request_id + ARTIFACTS[artifact])
+    return path if os.path.isfile(path) else None
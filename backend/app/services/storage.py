@@ -0,0 +1,339 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.blob import Blob
+from app.models.document import Document
+
+try:
+    import zstandard
+except ImportError:  # compression is optional
+    zstandard = None
+
+
+class StorageBackend(ABC):
+    """Minimal object store interface used by BlobStore."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Store data under key, replacing any existing object."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """Return the object stored under key."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Check whether an object is stored under key."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the object under key. Missing objects are ignored."""
+
+    @abstractmethod
+    def list_objects(self) -> Iterator[Tuple[str, datetime]]:
+        """Iterate over every stored key with its last modification time."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """Stores objects as files below a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                buffer.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as file:
+            return file.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list_objects(self) -> Iterator[Tuple[str, datetime]]:
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+                modified = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+                yield rel_path, modified
+
+
+class S3StorageBackend(StorageBackend):
+    """Stores objects in an S3-compatible bucket (e.g. a local MinIO)."""
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("boto3 is required for STORAGE_BACKEND=s3")
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list_objects(self) -> Iterator[Tuple[str, datetime]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["LastModified"]
+
+
+class BlobStore:
+    """
+    Content-addressed upload storage.
+
+    Each upload is keyed by the SHA-256 of its content and stored once in a
+    sharded layout (``ab/cd/abcd...``). The ``blobs`` table tracks how many
+    documents reference each blob so that garbage collection can reclaim
+    blobs nobody points at anymore.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self.compression = settings.STORAGE_COMPRESSION if zstandard else "none"
+
+    @staticmethod
+    def storage_key(content_hash: str) -> str:
+        shards = [content_hash[i * 2:i * 2 + 2] for i in range(settings.STORAGE_SHARD_DEPTH)]
+        return "/".join(shards + [content_hash])
+
+    @staticmethod
+    def _encode(content: bytes, compression: str) -> bytes:
+        """Compress content with the given codec ("zstd" or "none")."""
+        if compression == "zstd":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to write compressed blobs")
+            return zstandard.ZstdCompressor(level=settings.STORAGE_COMPRESSION_LEVEL).compress(content)
+        return content
+
+    def _compress(self, content: bytes) -> Tuple[bytes, str]:
+        if self.compression == "zstd":
+            compressed = self._encode(content, "zstd")
+            # PDFs and DOCX files are already compressed; only keep real savings
+            if len(compressed) < len(content):
+                return compressed, "zstd"
+        return content, "none"
+
+    def put(self, db: Session, content: bytes) -> Blob:
+        """
+        Store content and add a reference to it.
+
+        The blob row is upserted (and locked) before the object is written,
+        so a concurrent garbage collection run cannot delete the object
+        between the write and the caller's commit.
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        key = self.storage_key(content_hash)
+        data, compression = self._compress(content)
+
+        stmt = insert(Blob).values(
+            hash=content_hash,
+            storage_key=key,
+            size=len(content),
+            stored_size=len(data),
+            compression=compression,
+            ref_count=1
+        ).on_conflict_do_update(
+            index_elements=[Blob.hash],
+            set_={
+                "ref_count": Blob.ref_count + 1,
+                "last_referenced_at": func.now()
+            }
+        )
+        db.execute(stmt)
+        blob = db.get(Blob, content_hash, populate_existing=True)
+
+        if not self.backend.exists(blob.storage_key):
+            # An existing row may predate a change of STORAGE_COMPRESSION
+            if blob.compression != compression:
+                data = self._encode(content, blob.compression)
+            self.backend.put(blob.storage_key, data)
+
+        return blob
+
+    def get(self, db: Session, content_hash: str) -> Optional[bytes]:
+        """Return the original content of a blob, or None if it is unknown."""
+        blob = db.get(Blob, content_hash)
+        if not blob:
+            return None
+        data = self.backend.get(blob.storage_key)
+        if blob.compression == "zstd":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read compressed blobs")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def release(self, db: Session, content_hash: str) -> None:
+        """Drop one reference to a blob. The blob itself is removed by gc()."""
+        db.query(Blob).filter(Blob.hash == content_hash, Blob.ref_count > 0).update(
+            {Blob.ref_count: Blob.ref_count - 1},
+            synchronize_session=False
+        )
+
+    @staticmethod
+    def _legacy_documents(db: Session):
+        """Documents still pointing at a flat uploads/{uuid}{ext} file."""
+        return db.query(Document).filter(
+            Document.blob_hash.is_(None),
+            Document.file_path.like(f"{settings.UPLOAD_DIR}/%")
+        )
+
+    def backfill_legacy(self, db: Session, dry_run: bool = False) -> int:
+        """
+        Move uploads stored before the blob store existed into it.
+
+        Each legacy file is hashed into the blob store (so duplicates collapse
+        into one blob), its document is pointed at the blob and the flat file
+        is removed once that is committed. Missing files are skipped.
+        """
+        moved = 0
+        for document in self._legacy_documents(db).all():
+            legacy_path = document.file_path
+            if not os.path.isfile(legacy_path):
+                continue
+            moved += 1
+            if dry_run:
+                continue
+
+            with open(legacy_path, "rb") as file:
+                blob = self.put(db, file.read())
+            document.blob_hash = blob.hash
+            document.file_path = blob.storage_key
+            document.filename = os.path.basename(blob.storage_key)
+            db.commit()
+            os.remove(legacy_path)
+        return moved
+
+    def expire_documents(self, db: Session, retention_days: int, dry_run: bool = False) -> int:
+        """
+        Release the stored uploads of documents older than the retention
+        period, and delete their legacy flat files if they were never moved
+        into the blob store. The documents and their classification results
+        are kept.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        documents = db.query(Document).filter(
+            Document.created_at < cutoff,
+            Document.blob_hash.isnot(None)
+        ).all()
+        legacy_paths = [
+            document.file_path
+            for document in self._legacy_documents(db).filter(Document.created_at < cutoff)
+            if os.path.isfile(document.file_path)
+        ]
+        if dry_run:
+            return len(documents) + len(legacy_paths)
+
+        for document in documents:
+            self.release(db, document.blob_hash)
+            document.blob_hash = None
+        db.commit()
+        for legacy_path in legacy_paths:
+            os.remove(legacy_path)
+        return len(documents) + len(legacy_paths)
+
+    def gc(self, db: Session, grace_hours: int, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete unreferenced blobs and stray objects on the backend.
+
+        Rows are deleted and their objects removed inside one transaction, so
+        an upload racing on the same hash waits for this run to finish and
+        then writes the object again.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+        unreferenced = (Blob.ref_count <= 0) & (Blob.last_referenced_at < cutoff)
+
+        if dry_run:
+            blobs = db.query(Blob).filter(unreferenced).all()
+            deleted = [(blob.storage_key, blob.stored_size) for blob in blobs]
+        else:
+            deleted = db.execute(
+                Blob.__table__.delete()
+                .where(unreferenced)
+                .returning(Blob.storage_key, Blob.stored_size)
+            ).all()
+            for storage_key, _ in deleted:
+                self.backend.delete(storage_key)
+
+        # Objects left behind by failed uploads or manual changes. Recent
+        # objects may belong to an upload that has not committed yet.
+        known_keys = {key for (key,) in db.query(Blob.storage_key)}
+        orphans: List[str] = [
+            key for key, modified in self.backend.list_objects()
+            if key not in known_keys and modified < cutoff
+        ]
+        if not dry_run:
+            for key in orphans:
+                self.backend.delete(key)
+            db.commit()
+
+        return {
+            "blobs_deleted": len(deleted),
+            "bytes_reclaimed": sum(size for _, size in deleted),
+            "orphans_deleted": len(orphans)
+        }
+
+
+def get_blob_store() -> BlobStore:
+    if settings.STORAGE_BACKEND == "s3":
+        backend = S3StorageBackend(
+            settings.STORAGE_S3_ENDPOINT,
+            settings.STORAGE_S3_BUCKET,
+            settings.STORAGE_S3_ACCESS_KEY,
+            settings.STORAGE_S3_SECRET_KEY
+        )
+    elif settings.STORAGE_BACKEND == "local":
+        backend = LocalStorageBackend(settings.STORAGE_ROOT)
+    else:
+        raise ValueError(f"Unsupported storage backend: {settings.STORAGE_BACKEND}")
+    return BlobStore(backend)
@@ -3,11 +3,29 @@ CREATE DATABASE doc_classifier;
 \c doc_classifier
 
 DROP TABLE IF EXISTS documents;
+DROP TABLE IF EXISTS blobs;
+
+-- Content-addressed upload storage, one row per unique file
+CREATE TABLE blobs (
+    hash CHAR(64) PRIMARY KEY,
+    storage_key VARCHAR(255) NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    compression VARCHAR(16) NOT NULL DEFAULT 'none',
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_referenced_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ix_blobs_unreferenced ON blobs (last_referenced_at) WHERE ref_count <= 0;
+
+-- Range-partitioned by month on created_at; the partition key has to be
+-- part of the primary key.
 CREATE TABLE documents (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     filename VARCHAR(255) NOT NULL,
     original_filename VARCHAR(255) NOT NULL,
     file_path VARCHAR(255) NOT NULL,
+    blob_hash CHAR(64) REFERENCES blobs (hash),
     file_type VARCHAR(50) NOT NULL,
     file_size INTEGER NOT NULL,
     predicted_category VARCHAR(100) NOT NULL,
@@ -15,9 +33,19 @@ CREATE TABLE documents (
     category_scores JSONB NOT NULL,
     token_count INTEGER,
     num_chunks INTEGER,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE,
     title VARCHAR(255),
     description TEXT,
-    tags JSONB
-); 
\ No newline at end of file
+    tags JSONB,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX ix_documents_blob_hash ON documents (blob_hash);
+CREATE INDEX ix_documents_created_at ON documents (created_at);
+
+-- Catches rows for months whose partition has not been created yet
+CREATE TABLE documents_default PARTITION OF documents DEFAULT;
+
+\ir partitions.sql
+SELECT ensure_documents_partitions(3);
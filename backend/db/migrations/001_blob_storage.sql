@@ -0,0 +1,19 @@
+-- Adds content-addressed upload storage to an existing database.
+-- Existing documents keep their flat uploads/{uuid}{ext} path and no blob
+-- until `python -m app.cli.storage_gc` moves those files into the blob store.
+\c doc_classifier
+
+CREATE TABLE IF NOT EXISTS blobs (
+    hash CHAR(64) PRIMARY KEY,
+    storage_key VARCHAR(255) NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    compression VARCHAR(16) NOT NULL DEFAULT 'none',
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_referenced_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_blobs_unreferenced ON blobs (last_referenced_at) WHERE ref_count <= 0;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS blob_hash CHAR(64) REFERENCES blobs (hash);
+CREATE INDEX IF NOT EXISTS ix_documents_blob_hash ON documents (blob_hash);
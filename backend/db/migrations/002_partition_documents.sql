@@ -0,0 +1,65 @@
+-- Converts an existing unpartitioned documents table into a monthly
+-- range-partitioned one on created_at, keeping all rows and ids.
+-- Run after 001_blob_storage.sql, from the backend directory:
+--   psql -U postgres -f db/migrations/002_partition_documents.sql
+\c doc_classifier
+
+BEGIN;
+
+ALTER TABLE documents RENAME TO documents_legacy;
+ALTER TABLE documents_legacy RENAME CONSTRAINT documents_pkey TO documents_legacy_pkey;
+ALTER INDEX IF EXISTS ix_documents_blob_hash RENAME TO ix_documents_legacy_blob_hash;
+
+CREATE TABLE documents (
+    id INTEGER NOT NULL DEFAULT nextval('documents_id_seq'),
+    filename VARCHAR(255) NOT NULL,
+    original_filename VARCHAR(255) NOT NULL,
+    file_path VARCHAR(255) NOT NULL,
+    blob_hash CHAR(64) REFERENCES blobs (hash),
+    file_type VARCHAR(50) NOT NULL,
+    file_size INTEGER NOT NULL,
+    predicted_category VARCHAR(100) NOT NULL,
+    confidence_score FLOAT NOT NULL,
+    category_scores JSONB NOT NULL,
+    token_count INTEGER,
+    num_chunks INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    title VARCHAR(255),
+    description TEXT,
+    tags JSONB,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX ix_documents_blob_hash ON documents (blob_hash);
+CREATE INDEX ix_documents_created_at ON documents (created_at);
+CREATE TABLE documents_default PARTITION OF documents DEFAULT;
+
+\ir ../partitions.sql
+
+-- One partition for every month that has data, plus the usual months ahead
+SELECT create_documents_partition(month_start::DATE)
+FROM generate_series(
+    (SELECT date_trunc('month', min(created_at) AT TIME ZONE 'UTC') FROM documents_legacy),
+    date_trunc('month', now() AT TIME ZONE 'UTC'),
+    INTERVAL '1 month'
+) AS month_start;
+SELECT ensure_documents_partitions(3);
+
+INSERT INTO documents (
+    id, filename, original_filename, file_path, blob_hash, file_type, file_size,
+    predicted_category, confidence_score, category_scores, token_count, num_chunks,
+    created_at, updated_at, title, description, tags
+)
+SELECT
+    id, filename, original_filename, file_path, blob_hash, file_type, file_size,
+    predicted_category, confidence_score, category_scores, token_count, num_chunks,
+    COALESCE(created_at, CURRENT_TIMESTAMP), updated_at, title, description, tags
+FROM documents_legacy;
+
+ALTER SEQUENCE documents_id_seq OWNED BY documents.id;
+DROP TABLE documents_legacy;
+
+COMMIT;
+
+ANALYZE documents;
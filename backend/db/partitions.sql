@@ -0,0 +1,38 @@
+-- Partition maintenance for the monthly range-partitioned documents table.
+-- Included by init.sql and the partitioning migration; safe to re-run.
+
+-- Create (if missing) the partition holding the month that starts at month_start.
+-- Rows for that month that already landed in documents_default are moved over.
+CREATE OR REPLACE FUNCTION create_documents_partition(month_start DATE) RETURNS TEXT AS $$
+DECLARE
+    part_name TEXT := 'documents_' || to_char(month_start, 'YYYY_MM');
+    range_start TIMESTAMPTZ := date_trunc('month', month_start)::TIMESTAMP AT TIME ZONE 'UTC';
+    range_end TIMESTAMPTZ := (date_trunc('month', month_start) + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC';
+BEGIN
+    IF to_regclass(part_name) IS NOT NULL THEN
+        RETURN part_name;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE documents INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM documents_default WHERE created_at >= %L AND created_at < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        range_start, range_end, part_name
+    );
+    EXECUTE format(
+        'ALTER TABLE documents ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        part_name, range_start, range_end
+    );
+    RETURN part_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Make sure partitions exist from the current month up to months_ahead months out.
+CREATE OR REPLACE FUNCTION ensure_documents_partitions(months_ahead INTEGER) RETURNS SETOF TEXT AS $$
+    SELECT create_documents_partition(month_start::DATE)
+    FROM generate_series(
+        date_trunc('month', now() AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead),
+        INTERVAL '1 month'
+    ) AS month_start;
+$$ LANGUAGE sql;